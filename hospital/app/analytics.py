@@ -1,16 +1,35 @@
 import pandas as pd
 import numpy as np
+from functools import cached_property
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from fastapi import HTTPException
-from typing import Dict, Any, List
-from . import models
+from typing import Dict, Any, List, Optional, Callable
+from . import cohorts, models
 
 class HospitalAnalytics:
     def __init__(self, db: Session):
         self.db = db
-        self.patients_df = self._get_patients_df()
-        self.doctors_df = self._get_doctors_df()
-        self.appointments_df = self._get_appointments_df()
+
+    # The full ORM frames are only loaded by the methods that use them
+    @cached_property
+    def patients_df(self) -> pd.DataFrame:
+        return self._get_patients_df()
+
+    @cached_property
+    def doctors_df(self) -> pd.DataFrame:
+        return self._get_doctors_df()
+
+    @cached_property
+    def appointments_df(self) -> pd.DataFrame:
+        return self._get_appointments_df()
+
+    def _read_columns(self, *columns, where=None) -> pd.DataFrame:
+        # Column-only query read straight into a DataFrame, no ORM objects
+        query = select(*columns)
+        if where is not None:
+            query = query.where(where)
+        return pd.read_sql(query, self.db.connection())
 
     def _get_patients_df(self) -> pd.DataFrame:
         try:
@@ -19,7 +38,7 @@ class HospitalAnalytics:
                 return pd.DataFrame(columns=['id','name', 'age', 'address',])
             
             return pd.DataFrame([{
-                'id': patient.id,
+                'id': patient.patient_id,
                 'name': patient.name,
                 'age': patient.age,
                 'address': patient.address,
@@ -35,7 +54,7 @@ class HospitalAnalytics:
                 return pd.DataFrame(columns=['id', 'name', 'specialization'])
             
             return pd.DataFrame([{
-                'id': doctor.id,
+                'id': doctor.doctor_id,
                 'name': doctor.name,
                 'specialization': doctor.specialization,
                 # 'guider_ids': [g.id for g in guest.guiders]
@@ -50,7 +69,7 @@ class HospitalAnalytics:
                 return pd.DataFrame(columns=['id', 'patient_id', 'doctor_id', 'date', 'description'])
             
             return pd.DataFrame([{
-                'id': appointment.id,
+                'id': appointment.appointment_id,
                 'patient_id': appointment.patient_id,
                 'doctor_id': appointment.doctor_id,
                 'date': appointment.date,
@@ -80,20 +99,45 @@ class HospitalAnalytics:
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Error calculating basic stats: {str(e)}")
 
-    # def get_patient_distribution(self) -> Dict[str, Any]:
-    #     try:
-    #         if self.patients_df.empty:
-    #             return {
-    #                 'native_vs_imported': {},
-    #                 'species_distribution': {}
-    #             }
-            
-    #         return {
-    #             'native_vs_imported': self.patients_df['is_native'].value_counts().to_dict(),
-    #             'species_distribution': self.patients_df['species'].value_counts().to_dict()
-    #         }
-    #     except Exception as e:
-    #         raise HTTPException(status_code=500, detail=f"Error analyzing animal distribution: {str(e)}")
+    def get_patient_cohorts(
+        self,
+        since: Optional[pd.Timestamp] = None,
+        report: Optional[Callable[[float], None]] = None
+    ) -> Dict[str, Any]:
+        # report, when given, receives the fraction of the work done
+        report = report or (lambda progress: None)
+        try:
+            patients = self._read_columns(models.Patient.patient_id, models.Patient.age)
+            report(0.2)
+            doctors = self._read_columns(models.Doctor.doctor_id, models.Doctor.specialization)
+            report(0.3)
+            # since limits every section to the same appointment window
+            appointments = self._read_columns(
+                models.Appointment.patient_id,
+                models.Appointment.doctor_id,
+                where=models.Appointment.date >= pd.Timestamp(since).date() if since is not None else None
+            )
+            report(0.8)
+
+            patient_ids = patients['patient_id'].to_numpy()
+            ages = patients['age'].to_numpy(dtype=np.int64)
+            appointment_patient_ids = appointments['patient_id'].to_numpy()
+
+            return {
+                'age_band_distribution': cohorts.age_band_distribution(ages),
+                'visit_frequency': cohorts.visit_frequency(patient_ids, appointment_patient_ids),
+                'specialization_demand_by_age_band': cohorts.specialization_demand_by_age_band(
+                    patient_ids,
+                    ages,
+                    doctors['doctor_id'].to_numpy(),
+                    doctors['specialization'].to_numpy(),
+                    appointment_patient_ids,
+                    appointments['doctor_id'].to_numpy()
+                ),
+                'no_activity': cohorts.no_activity_cohorts(patient_ids, ages, appointment_patient_ids)
+            }
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error analyzing patient cohorts: {str(e)}")
 
     def get_doctors_analysis(self) -> Dict[str, Any]:
         try:
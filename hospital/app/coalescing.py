@@ -0,0 +1,97 @@
+import os
+import threading
+from typing import Any, Callable, Dict, Hashable
+
+
+COALESCING_ENABLED = os.getenv("COALESCING_ENABLED", "true").lower() == "true"
+# How long a follower waits on the in-flight query before running its own
+COALESCING_WAIT_TIMEOUT = float(os.getenv("COALESCING_WAIT_TIMEOUT", "5"))
+
+
+class _Call:
+    def __init__(self, generation: int):
+        self.generation = generation
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException = None
+
+
+class SingleFlight:
+    """Collapses concurrent identical reads into a single in-flight call.
+
+    The first caller for a key runs the query; callers arriving while it is
+    still running wait for it and share its result instead of hitting the DB.
+    Nothing is cached once the call finishes, but a shared result can predate a
+    write that committed while the query was running. Writers call
+    ``invalidate`` with the key namespace (the first element of the key tuple)
+    so later readers start a fresh query instead of joining an older one; only
+    readers arriving between the commit and ``invalidate`` can still see the
+    previous row.
+    """
+
+    def __init__(self, enabled: bool = True, wait_timeout: float = 5.0):
+        self.enabled = enabled
+        self.wait_timeout = wait_timeout
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        # namespace -> number of writes seen, bumped by invalidate()
+        self._generations: Dict[Hashable, int] = {}
+        self._metrics = {"executed": 0, "coalesced": 0, "timeouts": 0, "errors": 0}
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        if not self.enabled:
+            return fn()
+
+        with self._lock:
+            generation = self._generations.get(key[0], 0)
+            call = self._calls.get(key)
+            # Never join a call that started before the last write
+            leader = call is None or call.generation != generation
+            if leader:
+                call = _Call(generation)
+                self._calls[key] = call
+                self._metrics["executed"] += 1
+            else:
+                self._metrics["coalesced"] += 1
+
+        if not leader:
+            if not call.done.wait(self.wait_timeout):
+                with self._lock:
+                    self._metrics["timeouts"] += 1
+                return fn()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            with self._lock:
+                self._metrics["errors"] += 1
+            raise
+        finally:
+            with self._lock:
+                if self._calls.get(key) is call:
+                    del self._calls[key]
+            call.done.set()
+
+    def invalidate(self, *namespaces: Hashable):
+        with self._lock:
+            for namespace in namespaces:
+                self._generations[namespace] = self._generations.get(namespace, 0) + 1
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **self._metrics,
+                "in_flight": len(self._calls),
+                "enabled": self.enabled,
+            }
+
+
+read_coalescer = SingleFlight(
+    enabled=COALESCING_ENABLED,
+    wait_timeout=COALESCING_WAIT_TIMEOUT,
+)
@@ -0,0 +1,99 @@
+import numpy as np
+import pandas as pd
+from typing import Dict, Any, Optional
+
+# Same bands as create_new_features in dataframe.py:
+# Child < 18, Adult 18-65, Senior > 65
+AGE_BANDS = ["Child", "Adult", "Senior"]
+AGE_BAND_EDGES = np.array([18, 66])
+# Patients aged 90 and over are not considered active
+ACTIVE_AGE_LIMIT = 90
+
+
+def age_band_codes(ages) -> np.ndarray:
+    """Map ages to indices into AGE_BANDS."""
+    return np.searchsorted(AGE_BAND_EDGES, np.asarray(ages), side="right")
+
+
+def age_band_distribution(ages) -> Dict[str, int]:
+    counts = np.bincount(age_band_codes(ages), minlength=len(AGE_BANDS))
+    return dict(zip(AGE_BANDS, counts.tolist()))
+
+
+def visits_per_patient(patient_ids, appointment_patient_ids) -> np.ndarray:
+    """Number of appointments for each patient, aligned with patient_ids."""
+    positions = pd.Index(patient_ids).get_indexer(np.asarray(appointment_patient_ids))
+    # Appointments pointing at unknown patients are ignored
+    positions = positions[positions >= 0]
+    return np.bincount(positions, minlength=len(patient_ids))
+
+
+def visit_frequency(patient_ids, appointment_patient_ids) -> Dict[str, Any]:
+    visits = visits_per_patient(patient_ids, appointment_patient_ids)
+    if visits.size == 0:
+        return {'mean': 0.0, 'median': 0.0, 'max': 0, 'patients_by_visit_count': {}}
+
+    histogram = np.bincount(visits)
+    nonzero = np.flatnonzero(histogram)
+    return {
+        'mean': float(visits.mean()),
+        'median': float(np.median(visits)),
+        'max': int(visits.max()),
+        'patients_by_visit_count': dict(zip(nonzero.tolist(), histogram[nonzero].tolist())),
+    }
+
+
+def specialization_demand_by_age_band(
+    patient_ids,
+    ages,
+    doctor_ids,
+    specializations,
+    appointment_patient_ids,
+    appointment_doctor_ids,
+) -> Dict[str, Dict[str, int]]:
+    """Appointment counts per doctor specialization, split by patient age band."""
+    bands = age_band_codes(ages)
+    spec_codes, spec_names = pd.factorize(pd.Series(specializations))
+
+    patient_pos = pd.Index(patient_ids).get_indexer(np.asarray(appointment_patient_ids))
+    doctor_pos = pd.Index(doctor_ids).get_indexer(np.asarray(appointment_doctor_ids))
+    known = (patient_pos >= 0) & (doctor_pos >= 0)
+    appointment_bands = bands[patient_pos[known]]
+    appointment_specs = spec_codes[doctor_pos[known]]
+    # Unknown specializations are factorized to -1
+    valid = appointment_specs >= 0
+
+    n_bands = len(AGE_BANDS)
+    counts = np.bincount(
+        appointment_specs[valid] * n_bands + appointment_bands[valid],
+        minlength=len(spec_names) * n_bands,
+    ).reshape(len(spec_names), n_bands)
+
+    return {
+        str(name): dict(zip(AGE_BANDS, row.tolist()))
+        for name, row in zip(spec_names, counts)
+    }
+
+
+def no_activity_cohorts(
+    patient_ids,
+    ages,
+    appointment_patient_ids,
+    appointment_dates=None,
+    since: Optional[pd.Timestamp] = None,
+) -> Dict[str, Any]:
+    """Patients with no appointments (on or after ``since`` when given)."""
+    appointment_patient_ids = np.asarray(appointment_patient_ids)
+    if since is not None and appointment_dates is not None:
+        recent = pd.to_datetime(pd.Series(appointment_dates)).to_numpy() >= np.datetime64(pd.Timestamp(since))
+        appointment_patient_ids = appointment_patient_ids[recent]
+
+    ages = np.asarray(ages)
+    idle = visits_per_patient(patient_ids, appointment_patient_ids) == 0
+    idle_ages = ages[idle]
+    return {
+        'total': int(idle.sum()),
+        'by_age_band': age_band_distribution(idle_ages),
+        'active_age': int((idle_ages < ACTIVE_AGE_LIMIT).sum()),
+        'inactive_age': int((idle_ages >= ACTIVE_AGE_LIMIT).sum()),
+    }
@@ -1,5 +1,5 @@
-from sqlalchemy.orm import Session
-from datetime import date
+from sqlalchemy.orm import Session, defer
+from datetime import date, datetime, timedelta
 from app import models, schemas
 
 
@@ -123,6 +123,157 @@ def delete_appointment(db: Session, appointment_id: int):
         db.commit()
     return db_appointment
 
+# Create Job
+def create_job(db: Session, job: schemas.JobCreate):
+    db_job = models.Job(
+        kind=job.kind,
+        payload=job.payload,
+        status="queued"
+    )
+    db.add(db_job)
+    db.commit()
+    db.refresh(db_job)
+    return db_job
+
+# Read All Jobs
+def get_jobs(db: Session, skip: int = 0, limit: int = 10):
+    return (
+        db.query(models.Job)
+        .options(defer(models.Job.payload))
+        .order_by(models.Job.job_id.desc())
+        .offset(skip)
+        .limit(limit)
+        .all()
+    )
+
+# Read Single Job
+def get_job(db: Session, job_id: int):
+    return db.query(models.Job).options(defer(models.Job.payload)).filter(models.Job.job_id == job_id).first()
+
+# Claim the oldest queued job; SKIP LOCKED lets several workers poll safely.
+# The payload stays deferred until the handler reads it.
+def claim_next_job(db: Session):
+    db_job = (
+        db.query(models.Job)
+        .options(defer(models.Job.payload))
+        .filter(models.Job.status == "queued")
+        .order_by(models.Job.job_id)
+        .with_for_update(skip_locked=True)
+        .first()
+    )
+    if db_job:
+        db_job.status = "running"
+        db_job.started_at = datetime.utcnow()
+        db_job.heartbeat_at = db_job.started_at
+        db_job.attempts += 1
+        db.commit()
+        db.refresh(db_job)
+    return db_job
+
+# Worker-side writes only apply to the run that claimed the job: once its
+# lease expired and the job was claimed again, attempts no longer matches
+def _claimed_run(db: Session, job_id: int, attempt: int):
+    return db.query(models.Job).filter(
+        models.Job.job_id == job_id,
+        models.Job.status == "running",
+        models.Job.attempts == attempt,
+    )
+
+# Update Job Progress
+def update_job_progress(db: Session, job_id: int, attempt: int, progress: float):
+    updated = _claimed_run(db, job_id, attempt).update(
+        {models.Job.progress: progress, models.Job.heartbeat_at: datetime.utcnow()},
+        synchronize_session=False,
+    )
+    db.commit()
+    return updated
+
+# Refresh Job Heartbeat
+def touch_job(db: Session, job_id: int, attempt: int):
+    updated = _claimed_run(db, job_id, attempt).update(
+        {models.Job.heartbeat_at: datetime.utcnow()}, synchronize_session=False
+    )
+    db.commit()
+    return updated
+
+# Import rows are only needed until the job finishes, keep just their count
+def _strip_import_rows(db_job: models.Job):
+    if db_job.kind == "import" and db_job.payload and "rows" in db_job.payload:
+        payload = {key: value for key, value in db_job.payload.items() if key != "rows"}
+        payload["row_count"] = len(db_job.payload["rows"] or [])
+        db_job.payload = payload
+
+# Finish the claimed run of a job. Nothing is committed here so the caller
+# can commit the job's own writes and its completion together; None means
+# the lease was lost and the caller must roll back.
+def _finish_job(db: Session, job_id: int, attempt: int, status: str, result: dict = None, error: str = None):
+    db_job = _claimed_run(db, job_id, attempt).with_for_update().first()
+    if db_job:
+        db_job.status = status
+        if status == "succeeded":
+            db_job.progress = 1.0
+        db_job.result = result
+        db_job.error = error
+        db_job.finished_at = datetime.utcnow()
+        _strip_import_rows(db_job)
+        db.flush()
+    return db_job
+
+# Mark Job Succeeded
+def complete_job(db: Session, job_id: int, attempt: int, result: dict):
+    return _finish_job(db, job_id, attempt, "succeeded", result=result)
+
+# Mark Job Failed
+def fail_job(db: Session, job_id: int, attempt: int, error: str):
+    return _finish_job(db, job_id, attempt, "failed", error=error)
+
+# Requeue running jobs whose worker stopped heartbeating, or fail them once
+# they have used up their attempts
+def expire_job_leases(db: Session, lease_timeout: float, max_attempts: int):
+    cutoff = datetime.utcnow() - timedelta(seconds=lease_timeout)
+    expired = (
+        db.query(models.Job)
+        .options(defer(models.Job.payload))
+        .filter(models.Job.status == "running", models.Job.heartbeat_at < cutoff)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+    for db_job in expired:
+        if db_job.attempts >= max_attempts:
+            db_job.status = "failed"
+            db_job.error = f"Worker lost after {db_job.attempts} attempt(s)"
+            db_job.finished_at = datetime.utcnow()
+            _strip_import_rows(db_job)
+        else:
+            db_job.status = "queued"
+            db_job.progress = 0.0
+            db_job.started_at = None
+            db_job.heartbeat_at = None
+    db.commit()
+    return expired
+
+# Succeeded exports finished before the cutoff that still point at a file
+def get_expired_exports(db: Session, finished_before: datetime):
+    db_jobs = (
+        db.query(models.Job)
+        .options(defer(models.Job.payload))
+        .filter(
+            models.Job.kind == "export",
+            models.Job.status == "succeeded",
+            models.Job.finished_at < finished_before,
+        )
+        .all()
+    )
+    return [db_job for db_job in db_jobs if db_job.result and db_job.result.get("file")]
+
+# Forget the file of an export job once it has been removed
+def clear_export_file(db: Session, job_id: int):
+    db_job = db.query(models.Job).options(defer(models.Job.payload)).filter(models.Job.job_id == job_id).first()
+    if db_job and db_job.result:
+        db_job.result = {**db_job.result, "file": None, "expired": True}
+        db.commit()
+    return db_job
+
 # Create a new disease record
 # def create_disease(db: Session, disease: schemas.DiseaseCreate):
 #     db_disease = models.Disease(
@@ -25,6 +25,20 @@ def post_patients_to_api(df):
         except requests.exceptions.RequestException as e:
             print(f"Failed to upload patient: {patient_data['name']}\nError: {e}")
             continue
+
+# Step 1.2: Submit patients data as bulk import jobs instead of one request per row
+def post_patients_job_to_api(df, chunk_size=50000):
+    api_url = "http://127.0.0.1:8000/jobs/"
+    columns = ["name", "age", "address"]
+    for start in range(0, len(df), chunk_size):
+        rows = df[columns].iloc[start:start + chunk_size].to_dict(orient="records")
+        try:
+            response = requests.post(api_url, json={"kind": "import", "payload": {"table": "patients", "rows": rows}})
+            response.raise_for_status()
+            print(f"Submitted import job {response.json()['job_id']} for {len(rows)} patients")
+        except requests.exceptions.RequestException as e:
+            print(f"Failed to submit import job for rows {start}-{start + len(rows)}\nError: {e}")
+            continue
 print (pd.shape)
 # Step 2: Describe the dataset
 def describe_dataset(df):
@@ -80,6 +94,6 @@ if __name__ == "__main__":
     print("Dataset saved successfully.")
     
     print("\nPosting Patients Data to API...")
-    post_patients_to_api(df_patients)
+    post_patients_job_to_api(df_patients)
     
     print("\nData processing completed!")
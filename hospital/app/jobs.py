@@ -0,0 +1,152 @@
+import csv
+import logging
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict
+import pandas as pd
+from sqlalchemy.orm import Session
+from app import crud, models, schemas
+from app.analytics import HospitalAnalytics
+from app.database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+# Rows inserted / exported per batch, progress is reported after each batch
+JOB_CHUNK_SIZE = int(os.getenv("JOB_CHUNK_SIZE", "5000"))
+# Must be shared by the API and the workers, exports are served from here
+JOB_EXPORT_DIR = os.getenv("JOB_EXPORT_DIR", "exports")
+# Hours an export file is kept after its job finished
+JOB_EXPORT_TTL = float(os.getenv("JOB_EXPORT_TTL", "24"))
+# Seconds between heartbeats of a running job
+JOB_HEARTBEAT_INTERVAL = float(os.getenv("JOB_HEARTBEAT_INTERVAL", "10"))
+
+# table name -> (model, create schema, read schema)
+TABLES = {
+    "patients": (models.Patient, schemas.PatientCreate, schemas.Patient),
+    "doctors": (models.Doctor, schemas.DoctorCreate, schemas.Doctor),
+    "appointments": (models.Appointment, schemas.AppointmentCreate, schemas.Appointment),
+}
+
+Report = Callable[[float], None]
+
+
+def _table(payload: Dict[str, Any]):
+    table = payload.get("table")
+    if table not in TABLES:
+        raise ValueError(f"Unknown table: {table!r}, expected one of {sorted(TABLES)}")
+    return table, TABLES[table]
+
+
+def import_rows(db: Session, job: models.Job, report: Report) -> Dict[str, Any]:
+    """Bulk insert ``payload["rows"]`` into ``payload["table"]``, left uncommitted."""
+    table, (model, create_schema, _) = _table(job.payload or {})
+    # Validate everything up front so a bad row fails the job before any insert
+    rows = [create_schema(**row).model_dump() for row in job.payload.get("rows", [])]
+
+    for start in range(0, len(rows), JOB_CHUNK_SIZE):
+        chunk = rows[start:start + JOB_CHUNK_SIZE]
+        db.bulk_insert_mappings(model, chunk)
+        db.flush()
+        report((start + len(chunk)) / len(rows))
+    # run_job commits the rows together with the job's completion
+    return {"table": table, "rows": len(rows)}
+
+
+def export_rows(db: Session, job: models.Job, report: Report) -> Dict[str, Any]:
+    """Stream ``payload["table"]`` to a CSV file under JOB_EXPORT_DIR."""
+    table, (model, _, read_schema) = _table(job.payload or {})
+    columns = list(read_schema.model_fields)
+    total = db.query(model).count()
+
+    os.makedirs(JOB_EXPORT_DIR, exist_ok=True)
+    path = os.path.abspath(os.path.join(JOB_EXPORT_DIR, f"{table}-{job.job_id}.csv"))
+    written = 0
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=columns)
+        writer.writeheader()
+        for row in db.query(model).order_by(*model.__table__.primary_key.columns).yield_per(JOB_CHUNK_SIZE):
+            writer.writerow({column: getattr(row, column) for column in columns})
+            written += 1
+            if written % JOB_CHUNK_SIZE == 0:
+                report(written / total)
+    return {"table": table, "rows": written, "file": path}
+
+
+def refresh_analytics(db: Session, job: models.Job, report: Report) -> Dict[str, Any]:
+    """Recompute patient cohort analytics over appointments on or after ``payload["since"]``."""
+    since = (job.payload or {}).get("since")
+    return HospitalAnalytics(db).get_patient_cohorts(
+        since=pd.Timestamp(since) if since else None,
+        report=report
+    )
+
+
+# job kind -> handler(db, job, report) returning a JSON-serializable result
+HANDLERS = {
+    "import": import_rows,
+    "export": export_rows,
+    "analytics_refresh": refresh_analytics,
+}
+
+
+def _report_progress(job_id: int, attempt: int) -> Report:
+    # Progress goes through its own session so it is visible while the
+    # job's transaction is still open
+    def report(progress: float):
+        db = SessionLocal()
+        try:
+            crud.update_job_progress(db, job_id, attempt, min(progress, 1.0))
+        finally:
+            db.close()
+    return report
+
+
+def _heartbeat(job_id: int, attempt: int, done: threading.Event):
+    # Keeps the job's lease alive during long steps that report no progress
+    while not done.wait(JOB_HEARTBEAT_INTERVAL):
+        db = SessionLocal()
+        try:
+            crud.touch_job(db, job_id, attempt)
+        except Exception:
+            logger.exception("Failed to record heartbeat for job %s", job_id)
+        finally:
+            db.close()
+
+
+def run_job(db: Session, job: models.Job):
+    job_id, attempt = job.job_id, job.attempts
+    done = threading.Event()
+    heartbeat = threading.Thread(target=_heartbeat, args=(job_id, attempt, done), daemon=True)
+    heartbeat.start()
+    try:
+        try:
+            result = HANDLERS[job.kind](db, job, _report_progress(job_id, attempt))
+            # The handler's writes and the job's completion commit together
+            finished = crud.complete_job(db, job_id, attempt, result)
+            if finished:
+                db.commit()
+        except Exception as e:
+            logger.exception("Job %s (%s) failed", job_id, job.kind)
+            db.rollback()
+            finished = crud.fail_job(db, job_id, attempt, getattr(e, "detail", None) or str(e))
+            if finished:
+                db.commit()
+        if not finished:
+            logger.warning("Job %s lost its lease, discarding attempt %s", job_id, attempt)
+            db.rollback()
+    finally:
+        done.set()
+        heartbeat.join()
+
+
+def remove_expired_exports(db: Session):
+    """Delete export files older than JOB_EXPORT_TTL hours."""
+    cutoff = datetime.utcnow() - timedelta(hours=JOB_EXPORT_TTL)
+    for job in crud.get_expired_exports(db, cutoff):
+        try:
+            os.remove(job.result["file"])
+        except FileNotFoundError:
+            pass
+        crud.clear_export_file(db, job.job_id)
+        logger.info("Removed export file of job %s", job.job_id)
@@ -1,7 +1,12 @@
-from fastapi import FastAPI, Depends, HTTPException
+import math
+import os
+from fastapi import FastAPI, Depends, HTTPException, Request
+from fastapi.responses import FileResponse, JSONResponse
 from sqlalchemy.orm import Session
-from app import crud, models, schemas
+from app import crud, jobs, models, schemas
+from app.coalescing import read_coalescer
 from app.database import SessionLocal, engine
+from app.ratelimit import RATE_LIMIT_CLIENT_HEADER, rate_limiter
 
 # Initialize FastAPI app
 app = FastAPI()
@@ -17,6 +22,38 @@ def get_db():
     finally:
         db.close()
 
+# Identify the client for rate limiting. Behind a reverse proxy every request
+# comes from the proxy's address, so RATE_LIMIT_CLIENT_HEADER names a header
+# the (trusted) proxy sets with the real client address instead.
+def client_key(request: Request) -> str:
+    if RATE_LIMIT_CLIENT_HEADER:
+        forwarded = request.headers.get(RATE_LIMIT_CLIENT_HEADER)
+        if forwarded:
+            # X-Forwarded-For style lists start with the original client
+            return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else "unknown"
+
+# Per-client token-bucket rate limiting
+@app.middleware("http")
+async def rate_limit_requests(request: Request, call_next):
+    client = client_key(request)
+    allowed, retry_after = rate_limiter.allow(client)
+    if not allowed:
+        return JSONResponse(
+            status_code=429,
+            content={"detail": "Too many requests"},
+            headers={"Retry-After": str(math.ceil(retry_after))},
+        )
+    return await call_next(request)
+
+# Traffic metrics for rate limiting and read coalescing
+@app.get("/metrics/traffic")
+def get_traffic_metrics():
+    return {
+        "rate_limit": rate_limiter.metrics(),
+        "coalescing": read_coalescer.metrics(),
+    }
+
 # Patients Endpoints
 @app.post("/patients/", response_model=schemas.Patient)
 def create_patient(patient: schemas.PatientCreate, db: Session = Depends(get_db)):
@@ -50,15 +87,28 @@ def delete_patient(patient_id: int, db: Session = Depends(get_db)):
 # Doctors Endpoints
 @app.post("/doctors/", response_model=schemas.Doctor)
 def create_doctor(doctor: schemas.DoctorCreate, db: Session = Depends(get_db)):
-    return crud.create_doctor(db, doctor)
+    doctor = crud.create_doctor(db, doctor)
+    read_coalescer.invalidate("doctors", "doctor")
+    return doctor
+
+# Detach results from the leader's session so they can be shared across requests
+def _doctor_schema(doctor):
+    return schemas.Doctor.model_validate(doctor) if doctor else None
 
 @app.get("/doctors/", response_model=list[schemas.Doctor])
 def get_doctors(skip: int = 0, limit: int = 10, db: Session = Depends(get_db)):
-    return crud.get_doctors(db, skip=skip, limit=limit)
+    # Concurrent identical page requests share one query
+    return read_coalescer.do(
+        ("doctors", skip, limit),
+        lambda: [schemas.Doctor.model_validate(d) for d in crud.get_doctors(db, skip=skip, limit=limit)],
+    )
 
 @app.get("/doctors/{doctor_id}", response_model=schemas.Doctor)
 def get_doctor(doctor_id: int, db: Session = Depends(get_db)):
-    doctor = crud.get_doctor(db, doctor_id)
+    doctor = read_coalescer.do(
+        ("doctor", doctor_id),
+        lambda: _doctor_schema(crud.get_doctor(db, doctor_id)),
+    )
     if not doctor:
         raise HTTPException(status_code=404, detail="Doctor not found")
     return doctor
@@ -66,6 +116,7 @@ def get_doctor(doctor_id: int, db: Session = Depends(get_db)):
 @app.put("/doctors/{doctor_id}", response_model=schemas.Doctor)
 def update_doctor(doctor_id: int, updated_doctor: schemas.DoctorCreate, db: Session = Depends(get_db)):
     doctor = crud.update_doctor(db, doctor_id, updated_doctor)
+    read_coalescer.invalidate("doctors", "doctor")
     if not doctor:
         raise HTTPException(status_code=404, detail="Doctor not found")
     return doctor
@@ -73,6 +124,7 @@ def update_doctor(doctor_id: int, updated_doctor: schemas.DoctorCreate, db: Sess
 @app.delete("/doctors/{doctor_id}")
 def delete_doctor(doctor_id: int, db: Session = Depends(get_db)):
     doctor = crud.delete_doctor(db, doctor_id)
+    read_coalescer.invalidate("doctors", "doctor")
     if not doctor:
         raise HTTPException(status_code=404, detail="Doctor not found")
     return {"message": "Doctor deleted successfully"}
@@ -107,6 +159,40 @@ def delete_appointment(appointment_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Appointment not found")
     return {"message": "Appointment deleted successfully"}
 
+# Jobs Endpoints
+@app.post("/jobs/", response_model=schemas.Job, status_code=202)
+def submit_job(job: schemas.JobCreate, db: Session = Depends(get_db)):
+    if job.kind not in jobs.HANDLERS:
+        raise HTTPException(status_code=400, detail=f"Unknown job kind, expected one of {sorted(jobs.HANDLERS)}")
+    return crud.create_job(db, job)
+
+@app.get("/jobs/", response_model=list[schemas.Job])
+def get_jobs(skip: int = 0, limit: int = 10, db: Session = Depends(get_db)):
+    return crud.get_jobs(db, skip=skip, limit=limit)
+
+@app.get("/jobs/{job_id}", response_model=schemas.Job)
+def get_job(job_id: int, db: Session = Depends(get_db)):
+    job = crud.get_job(db, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@app.get("/jobs/{job_id}/result", response_model=schemas.JobResult)
+def get_job_result(job_id: int, db: Session = Depends(get_db)):
+    job = crud.get_job(db, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job.status != "succeeded":
+        raise HTTPException(status_code=409, detail=f"Job is {job.status}")
+    # Exports are served as the CSV file they produced, which must be on a
+    # JOB_EXPORT_DIR shared with the workers
+    if job.result and "file" in job.result:
+        path = job.result["file"]
+        if not path or not os.path.isfile(path):
+            raise HTTPException(status_code=410, detail="Export file is no longer available")
+        return FileResponse(path, media_type="text/csv", filename=os.path.basename(path))
+    return job
+
 # Diseases end points
 
 # @app.post("/diseases/", response_model=schemas.Disease)
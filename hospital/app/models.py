@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, Date, ForeignKey
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, Date, DateTime, Float, ForeignKey, JSON, Text
 from sqlalchemy.orm import relationship
 from .database import Base
 
@@ -49,4 +50,22 @@ class Appointment(Base):
 
     # Relationships
     patient = relationship("Patient", back_populates="appointments")
-    doctor = relationship("Doctor", back_populates="appointments")
\ No newline at end of file
+    doctor = relationship("Doctor", back_populates="appointments")
+
+# Job Model
+class Job(Base):
+    __tablename__ = "jobs"
+    job_id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String, nullable=False)
+    # queued -> running -> succeeded | failed
+    status = Column(String, nullable=False, default="queued", index=True)
+    progress = Column(Float, nullable=False, default=0.0)
+    payload = Column(JSON, nullable=True)
+    result = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    # Refreshed by the worker while the job runs; a stale value means it died
+    heartbeat_at = Column(DateTime, nullable=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    finished_at = Column(DateTime, nullable=True)
@@ -0,0 +1,87 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Tuple
+
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+# Sustained requests per second allowed for each client
+RATE_LIMIT_RATE = float(os.getenv("RATE_LIMIT_RATE", "20"))
+# Bucket size, i.e. how many requests a client may burst above the rate
+RATE_LIMIT_BURST = float(os.getenv("RATE_LIMIT_BURST", "40"))
+# Upper bound on tracked clients, the least recently seen are dropped first
+RATE_LIMIT_MAX_CLIENTS = int(os.getenv("RATE_LIMIT_MAX_CLIENTS", "10000"))
+# Header carrying the real client address when running behind a trusted
+# reverse proxy (e.g. X-Forwarded-For); empty means use the socket peer
+RATE_LIMIT_CLIENT_HEADER = os.getenv("RATE_LIMIT_CLIENT_HEADER", "")
+
+
+class TokenBucketLimiter:
+    """Per-client token bucket.
+
+    Every client starts with a full bucket of ``burst`` tokens which refills
+    at ``rate`` tokens per second. A request costs one token, so normal
+    traffic is never delayed and only clients exceeding the rate are refused.
+    """
+
+    def __init__(self, rate: float, burst: float, max_clients: int = 10000, enabled: bool = True):
+        if enabled and rate <= 0:
+            raise ValueError(f"Rate limit rate must be positive, got {rate}")
+        if enabled and burst < 1:
+            raise ValueError(f"Rate limit burst must be at least 1, got {burst}")
+        if max_clients < 1:
+            raise ValueError(f"Rate limit max clients must be at least 1, got {max_clients}")
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        # client -> (tokens, last refill timestamp), least recently seen first
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._metrics = {"allowed": 0, "rejected": 0, "evicted": 0}
+
+    def allow(self, client: str) -> Tuple[bool, float]:
+        """Take a token for ``client``; returns (allowed, seconds until retry)."""
+        if not self.enabled:
+            return True, 0.0
+
+        now = time.monotonic()
+        with self._lock:
+            tokens, last = self._buckets.get(client, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - last) * self.rate)
+
+            if tokens >= 1:
+                self._buckets[client] = (tokens - 1, now)
+                self._metrics["allowed"] += 1
+                allowed, retry_after = True, 0.0
+            else:
+                self._buckets[client] = (tokens, now)
+                self._metrics["rejected"] += 1
+                allowed, retry_after = False, (1 - tokens) / self.rate
+
+            self._buckets.move_to_end(client)
+            if len(self._buckets) > self.max_clients:
+                # Evicting the least recently seen client keeps allow() O(1);
+                # at worst it comes back with a fresh, full bucket
+                self._buckets.popitem(last=False)
+                self._metrics["evicted"] += 1
+        return allowed, retry_after
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **self._metrics,
+                "tracked_clients": len(self._buckets),
+                "rate": self.rate,
+                "burst": self.burst,
+                "enabled": self.enabled,
+            }
+
+
+rate_limiter = TokenBucketLimiter(
+    rate=RATE_LIMIT_RATE,
+    burst=RATE_LIMIT_BURST,
+    max_clients=RATE_LIMIT_MAX_CLIENTS,
+    enabled=RATE_LIMIT_ENABLED,
+)
@@ -1,6 +1,6 @@
 from pydantic import BaseModel
-from typing import Optional, List
-from datetime import date
+from typing import Optional, List, Dict, Any
+from datetime import date, datetime
 
 # Patient Schemas
 class PatientBase(BaseModel):
@@ -69,4 +69,32 @@ class Appointment(AppointmentBase):
    
 
     class Config:
-         from_attributes = True  
\ No newline at end of file
+         from_attributes = True  
+
+# Job Schemas
+class JobCreate(BaseModel):
+    kind: str
+    payload: Optional[Dict[str, Any]] = None
+
+class Job(BaseModel):
+    job_id: int
+    kind: str
+    status: str
+    progress: float
+    attempts: int
+    error: Optional[str]
+    created_at: datetime
+    started_at: Optional[datetime]
+    heartbeat_at: Optional[datetime]
+    finished_at: Optional[datetime]
+
+    class Config:
+         from_attributes = True
+
+class JobResult(BaseModel):
+    job_id: int
+    status: str
+    result: Optional[Dict[str, Any]]
+
+    class Config:
+         from_attributes = True
@@ -0,0 +1,97 @@
+import logging
+import multiprocessing
+import os
+import signal
+import time
+from app import crud, models
+from app.database import SessionLocal, engine
+from app.jobs import remove_expired_exports, run_job
+
+logger = logging.getLogger(__name__)
+
+# Number of jobs processed concurrently
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+# Seconds an idle worker waits before polling for queued jobs again
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "1"))
+# Seconds without a heartbeat before a running job is considered lost
+JOB_LEASE_TIMEOUT = float(os.getenv("JOB_LEASE_TIMEOUT", "60"))
+# Runs a lost job gets before it is failed instead of requeued
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+# Seconds between export file clean-ups in the parent process
+JOB_CLEANUP_INTERVAL = float(os.getenv("JOB_CLEANUP_INTERVAL", "300"))
+
+
+def work(stop):
+    # Shutdown is handled by the parent, which lets the current job finish
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    # Drop the pool inherited from the parent without closing its connections
+    engine.dispose(close=False)
+    while not stop.is_set():
+        db = SessionLocal()
+        job = None
+        try:
+            for lost in crud.expire_job_leases(db, JOB_LEASE_TIMEOUT, JOB_MAX_ATTEMPTS):
+                logger.warning("Job %s lost its worker, now %s", lost.job_id, lost.status)
+            job = crud.claim_next_job(db)
+            if job:
+                logger.info("Running job %s (%s)", job.job_id, job.kind)
+                run_job(db, job)
+        except Exception:
+            logger.exception("Worker failed to process a job")
+            job = None
+        finally:
+            db.close()
+        if not job:
+            stop.wait(JOB_POLL_INTERVAL)
+
+
+def cleanup():
+    db = SessionLocal()
+    try:
+        remove_expired_exports(db)
+    except Exception:
+        logger.exception("Failed to remove expired exports")
+    finally:
+        db.close()
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(processName)s %(message)s")
+    models.Base.metadata.create_all(bind=engine)
+    engine.dispose()
+
+    stop = multiprocessing.Event()
+    # Treat SIGTERM like Ctrl+C; stop must not be set from inside the handler
+    # since the main loop may be holding its lock in stop.wait()
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+
+    def spawn(i):
+        worker = multiprocessing.Process(target=work, args=(stop,), name=f"job-worker-{i}")
+        worker.start()
+        return worker
+
+    workers = [spawn(i) for i in range(JOB_WORKERS)]
+    logger.info("Started %d job workers", len(workers))
+    next_cleanup = time.monotonic()
+    try:
+        while not stop.is_set():
+            # Replace workers that died (OOM kill, segfault, ...) so the pool
+            # keeps its size; their jobs are picked up again once the lease expires
+            for i, worker in enumerate(workers):
+                if not worker.is_alive():
+                    logger.warning("%s exited with code %s, restarting", worker.name, worker.exitcode)
+                    workers[i] = spawn(i)
+            if time.monotonic() >= next_cleanup:
+                cleanup()
+                next_cleanup = time.monotonic() + JOB_CLEANUP_INTERVAL
+            stop.wait(JOB_POLL_INTERVAL)
+    except KeyboardInterrupt:
+        stop.set()
+    logger.info("Stopping job workers")
+    for worker in workers:
+        worker.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+import threading
+import time
+from app.coalescing import SingleFlight
+
+
+def wait_until(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not reached"
+        time.sleep(0.001)
+
+
+def start(fn):
+    results = {}
+
+    def target():
+        try:
+            results["value"] = fn()
+        except Exception as e:
+            results["error"] = e
+
+    thread = threading.Thread(target=target)
+    thread.start()
+    return thread, results
+
+
+def blocking(release, value, calls):
+    def fn():
+        calls.append(value)
+        release.wait(2)
+        return value
+    return fn
+
+
+def test_concurrent_identical_reads_share_one_call():
+    flight = SingleFlight()
+    release, calls = threading.Event(), []
+    threads = [start(lambda: flight.do(("doctors", 0, 10), blocking(release, "rows", calls))) for _ in range(10)]
+    wait_until(lambda: flight.metrics()["coalesced"] == 9)
+    release.set()
+    for thread, results in threads:
+        thread.join()
+        assert results["value"] == "rows"
+    assert calls == ["rows"]
+    assert flight.metrics()["in_flight"] == 0
+
+
+def test_different_keys_do_not_coalesce():
+    flight = SingleFlight()
+    assert flight.do(("doctor", 1), lambda: 1) == 1
+    assert flight.do(("doctor", 2), lambda: 2) == 2
+    assert flight.metrics()["executed"] == 2
+
+
+def test_error_is_shared_with_followers():
+    flight = SingleFlight()
+    release = threading.Event()
+
+    def failing():
+        release.wait(2)
+        raise RuntimeError("db down")
+
+    leader, leader_results = start(lambda: flight.do(("doctor", 1), failing))
+    wait_until(lambda: flight.metrics()["in_flight"] == 1)
+    follower, follower_results = start(lambda: flight.do(("doctor", 1), lambda: "unused"))
+    wait_until(lambda: flight.metrics()["coalesced"] == 1)
+    release.set()
+    leader.join()
+    follower.join()
+    assert str(leader_results["error"]) == "db down"
+    assert follower_results["error"] is leader_results["error"]
+    assert flight.metrics()["errors"] == 1
+
+
+def test_follower_runs_its_own_call_after_timeout():
+    flight = SingleFlight(wait_timeout=0.05)
+    release, calls = threading.Event(), []
+    leader, _ = start(lambda: flight.do(("doctor", 1), blocking(release, "slow", calls)))
+    wait_until(lambda: flight.metrics()["in_flight"] == 1)
+    assert flight.do(("doctor", 1), lambda: "own") == "own"
+    assert flight.metrics()["timeouts"] == 1
+    release.set()
+    leader.join()
+
+
+def test_invalidate_starts_a_new_call_instead_of_joining():
+    flight = SingleFlight()
+    release_old, release_new, calls = threading.Event(), threading.Event(), []
+    old, old_results = start(lambda: flight.do(("doctor", 1), blocking(release_old, "old", calls)))
+    wait_until(lambda: calls == ["old"])
+
+    flight.invalidate("doctor")
+    new, new_results = start(lambda: flight.do(("doctor", 1), blocking(release_new, "new", calls)))
+    wait_until(lambda: calls == ["old", "new"])
+    # A later reader joins the call that started after the write
+    joined, joined_results = start(lambda: flight.do(("doctor", 1), lambda: "unused"))
+    wait_until(lambda: flight.metrics()["coalesced"] == 1)
+
+    # The old call finishing must not drop the newer in-flight call
+    release_old.set()
+    old.join()
+    assert flight.metrics()["in_flight"] == 1
+
+    release_new.set()
+    new.join()
+    joined.join()
+    assert old_results["value"] == "old"
+    assert new_results["value"] == "new"
+    assert joined_results["value"] == "new"
+
+
+def test_invalidate_only_affects_its_namespace():
+    flight = SingleFlight()
+    release, calls = threading.Event(), []
+    leader, _ = start(lambda: flight.do(("doctors", 0, 10), blocking(release, "rows", calls)))
+    wait_until(lambda: calls == ["rows"])
+    flight.invalidate("doctor")
+    follower, results = start(lambda: flight.do(("doctors", 0, 10), lambda: "unused"))
+    wait_until(lambda: flight.metrics()["coalesced"] == 1)
+    release.set()
+    leader.join()
+    follower.join()
+    assert results["value"] == "rows"
+
+
+def test_disabled_always_calls_through():
+    flight = SingleFlight(enabled=False)
+    calls = []
+    for _ in range(3):
+        flight.do(("doctor", 1), lambda: calls.append(1))
+    assert len(calls) == 3
+    assert flight.metrics()["executed"] == 0
@@ -0,0 +1,101 @@
+import numpy as np
+import pandas as pd
+from app import cohorts
+
+
+def test_age_bands_match_create_new_features():
+    ages = np.array([0, 17, 18, 65, 66, 100])
+    assert cohorts.age_band_codes(ages).tolist() == [0, 0, 1, 1, 2, 2]
+    assert cohorts.age_band_distribution(ages) == {'Child': 2, 'Adult': 2, 'Senior': 2}
+
+
+def test_age_band_distribution_empty():
+    assert cohorts.age_band_distribution(np.array([], dtype=np.int64)) == {'Child': 0, 'Adult': 0, 'Senior': 0}
+
+
+def test_visits_per_patient_drops_unknown_patients():
+    visits = cohorts.visits_per_patient(np.array([10, 20, 30]), np.array([10, 10, 30, 99]))
+    assert visits.tolist() == [2, 0, 1]
+
+
+def test_visit_frequency():
+    result = cohorts.visit_frequency(np.array([1, 2, 3, 4]), np.array([1, 1, 2]))
+    assert result == {
+        'mean': 0.75,
+        'median': 0.5,
+        'max': 2,
+        'patients_by_visit_count': {0: 2, 1: 1, 2: 1},
+    }
+
+
+def test_visit_frequency_empty():
+    result = cohorts.visit_frequency(np.array([]), np.array([]))
+    assert result == {'mean': 0.0, 'median': 0.0, 'max': 0, 'patients_by_visit_count': {}}
+
+
+def test_specialization_demand_by_age_band():
+    demand = cohorts.specialization_demand_by_age_band(
+        patient_ids=np.array([1, 2, 3]),
+        ages=np.array([10, 40, 70]),
+        doctor_ids=np.array([7, 8]),
+        specializations=np.array(["Peds", "Cardio"], dtype=object),
+        appointment_patient_ids=np.array([1, 2, 3, 3]),
+        appointment_doctor_ids=np.array([7, 8, 8, 8]),
+    )
+    assert demand == {
+        'Peds': {'Child': 1, 'Adult': 0, 'Senior': 0},
+        'Cardio': {'Child': 0, 'Adult': 1, 'Senior': 2},
+    }
+
+
+def test_specialization_demand_drops_unknown_ids_and_specializations():
+    demand = cohorts.specialization_demand_by_age_band(
+        patient_ids=np.array([1]),
+        ages=np.array([40]),
+        doctor_ids=np.array([7, 8]),
+        specializations=np.array(["Cardio", None], dtype=object),
+        # unknown patient, unknown doctor, doctor without specialization, valid
+        appointment_patient_ids=np.array([99, 1, 1, 1]),
+        appointment_doctor_ids=np.array([7, 99, 8, 7]),
+    )
+    assert demand == {'Cardio': {'Child': 0, 'Adult': 1, 'Senior': 0}}
+
+
+def test_specialization_demand_empty():
+    empty = np.array([], dtype=object)
+    assert cohorts.specialization_demand_by_age_band(empty, empty, empty, empty, empty, empty) == {}
+
+
+def test_no_activity_cohorts_active_age_cutoff():
+    result = cohorts.no_activity_cohorts(
+        patient_ids=np.array([1, 2, 3, 4]),
+        ages=np.array([89, 90, 30, 5]),
+        appointment_patient_ids=np.array([3]),
+    )
+    assert result == {
+        'total': 3,
+        'by_age_band': {'Child': 1, 'Adult': 0, 'Senior': 2},
+        'active_age': 2,
+        'inactive_age': 1,
+    }
+
+
+def test_no_activity_cohorts_since():
+    result = cohorts.no_activity_cohorts(
+        patient_ids=np.array([1, 2]),
+        ages=np.array([30, 30]),
+        appointment_patient_ids=np.array([1, 2]),
+        appointment_dates=np.array(["2024-01-01", "2025-06-01"], dtype=object),
+        since=pd.Timestamp("2025-01-01"),
+    )
+    assert result['total'] == 1
+
+
+def test_no_activity_cohorts_empty():
+    empty = np.array([], dtype=np.int64)
+    assert cohorts.no_activity_cohorts(empty, empty, empty) == {
+        'total': 0,
+        'by_age_band': {'Child': 0, 'Adult': 0, 'Senior': 0},
+        'active_age': 0,
+        'inactive_age': 0,
+    }
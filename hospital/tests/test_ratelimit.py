@@ -0,0 +1,92 @@
+import threading
+import types
+import pytest
+from app import ratelimit
+from app.ratelimit import TokenBucketLimiter
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = {"value": 100.0}
+    monkeypatch.setattr(ratelimit, "time", types.SimpleNamespace(monotonic=lambda: now["value"]))
+    return now
+
+
+def test_burst_then_reject_with_retry_after(clock):
+    limiter = TokenBucketLimiter(rate=2, burst=3)
+    assert [limiter.allow("a")[0] for _ in range(3)] == [True, True, True]
+    allowed, retry_after = limiter.allow("a")
+    assert not allowed
+    assert retry_after == pytest.approx(0.5)
+
+
+def test_tokens_refill_at_rate_up_to_burst(clock):
+    limiter = TokenBucketLimiter(rate=2, burst=3)
+    for _ in range(3):
+        limiter.allow("a")
+    clock["value"] += 0.5
+    assert limiter.allow("a")[0]
+    assert not limiter.allow("a")[0]
+
+    # A long idle period never refills beyond the burst
+    clock["value"] += 60
+    assert [limiter.allow("a")[0] for _ in range(4)] == [True, True, True, False]
+
+
+def test_retry_after_accounts_for_partial_tokens(clock):
+    limiter = TokenBucketLimiter(rate=1, burst=1)
+    limiter.allow("a")
+    clock["value"] += 0.25
+    allowed, retry_after = limiter.allow("a")
+    assert not allowed
+    assert retry_after == pytest.approx(0.75)
+
+
+def test_clients_have_separate_buckets(clock):
+    limiter = TokenBucketLimiter(rate=1, burst=1)
+    assert limiter.allow("a")[0]
+    assert not limiter.allow("a")[0]
+    assert limiter.allow("b")[0]
+
+
+def test_least_recently_seen_client_is_evicted(clock):
+    limiter = TokenBucketLimiter(rate=1, burst=1, max_clients=2)
+    limiter.allow("a")
+    limiter.allow("b")
+    # Touching a makes b the least recently seen client
+    limiter.allow("a")
+    limiter.allow("c")
+    metrics = limiter.metrics()
+    assert metrics["tracked_clients"] == 2
+    assert metrics["evicted"] == 1
+    # a is still tracked with an empty bucket, b comes back with a fresh one
+    assert not limiter.allow("a")[0]
+    assert limiter.allow("b")[0]
+
+
+@pytest.mark.parametrize("rate, burst", [(0, 10), (-1, 10), (1, 0.5)])
+def test_invalid_config_is_rejected(rate, burst):
+    with pytest.raises(ValueError):
+        TokenBucketLimiter(rate=rate, burst=burst)
+
+
+def test_disabled_limiter_allows_everything():
+    limiter = TokenBucketLimiter(rate=0, burst=0, enabled=False)
+    assert all(limiter.allow("a")[0] for _ in range(100))
+
+
+def test_concurrent_requests_never_exceed_burst(clock):
+    limiter = TokenBucketLimiter(rate=1, burst=50)
+    results = []
+
+    def hit():
+        for _ in range(20):
+            results.append(limiter.allow("a")[0])
+
+    threads = [threading.Thread(target=hit) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results.count(True) == 50
+    assert limiter.metrics()["rejected"] == 110